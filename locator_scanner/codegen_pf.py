@@ -2,39 +2,67 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
+from operator import attrgetter
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, List, Optional
 
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+try:
+    import orjson
+except ImportError:  # optional speedup (pip install "Locat8r[fast]")
+    orjson = None
 
-from .locators_pf import pick_findby
-from .naming_pf import to_field_base, dedupe_names, to_class_name
+from .locators_pf import escape_java_string, pick_findby
+from .scan_element import Element
+from .naming_pf import to_field_bases, dedupe_names, to_class_name
+
+if TYPE_CHECKING:
+    from jinja2 import Environment, Template
 
 DEFAULT_PACKAGE = "com.example.pages"
 DEFAULT_TIMEOUT = 5
 DEFAULT_NAME_ANNOTATION_IMPORT = "com.example.annotations.Name"
+TEMPLATE_NAME = "templates_PageObjectPF.j2"
+HEADER_TEMPLATE_NAME = "templates_PageObjectPF_header.j2"
+# Below this many files a process pool costs more than it saves
+PARALLEL_MIN_FILES = 4
+# "builtin" emits Java with str.join; "jinja" renders the .j2 templates
+ENGINES = ("builtin", "jinja")
+DEFAULT_ENGINE = "builtin"
+
+_JAVA_IMPORTS = (
+    "import org.openqa.selenium.*;",
+    "import org.openqa.selenium.support.*;",
+    "import org.openqa.selenium.support.ui.*;",
+    "import java.time.Duration;",
+)
 
 
-@dataclass
+@dataclass(frozen=True)
 class FieldDef:
+    # Explicit __slots__ (dataclass(slots=True) needs Python 3.10+)
+    __slots__ = ("name", "display_name", "findby_attr", "findby_value")
+
     name: str
     display_name: str
     findby_attr: str
     findby_value: str
 
 
-def _load_json(path: Path) -> List[Dict]:
-    with path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
-        if not isinstance(data, list):
-            raise ValueError(f"Expected a JSON array in {path}")
-        return data
+def _load_json(path: Path) -> List[Element]:
+    raw = path.read_bytes()
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    if not isinstance(data, list):
+        raise ValueError(f"Expected a JSON array in {path}")
+    return [Element.from_dict(d) for d in data]
 
 
-def _compute_fields(elements: List[Dict]) -> List[FieldDef]:
-    bases = [to_field_base(e) for e in elements]
+def _compute_fields(elements: List[Element]) -> List[FieldDef]:
+    bases = to_field_bases(elements)
     unique_names = dedupe_names(bases)
 
     fields: List[FieldDef] = []
@@ -42,10 +70,10 @@ def _compute_fields(elements: List[Dict]) -> List[FieldDef]:
         picked = pick_findby(e)
         if not picked:
             # Skip elements without suitable locator
-            print(f"[codegen_pf] Warning: skipped element without stable locator: {e.get('tag')} name={e.get('name')} id={e.get('id')}", file=sys.stderr)
+            print(f"[codegen_pf] Warning: skipped element without stable locator: {e.tag} name={e.name} id={e.id}", file=sys.stderr)
             continue
         attr, value = picked
-        display_name = str(e.get("name") or e.get("id") or e.get("attributes", {}).get("name") or fname)
+        display_name = escape_java_string(str(e.name or e.id or e.attributes.get("name") or fname))
         fields.append(FieldDef(
             name=fname,
             display_name=display_name,
@@ -54,38 +82,112 @@ def _compute_fields(elements: List[Dict]) -> List[FieldDef]:
         ))
 
     # Deterministic sorting
-    fields.sort(key=lambda f: f.name)
+    fields.sort(key=attrgetter("name"))
     return fields
 
 
-def _render_class(package: str, class_name: str, provided_name: str, fields: List[FieldDef], timeout_seconds: int, name_annotation_import: str, template_dir: Path, out_dir: Path, source_file: Optional[Path] = None) -> Path:
-    env = Environment(
+@lru_cache(maxsize=None)
+def _get_env(template_dir: Path) -> Environment:
+    # One Environment per template dir so compiled templates stay cached across pages;
+    # the on-disk bytecode cache lets later processes skip parsing too.
+    # Imported here: only the "jinja" engine needs it, so the CLI starts without it.
+    from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+    # No directory argument: jinja2 then uses a per-user _jinja2-cache-<uid> dir that it
+    # checks is owned by us with mode 0700, so other users cannot plant compiled code
+    try:
+        bytecode_cache = FileSystemBytecodeCache()
+    except (OSError, RuntimeError):  # unusable or not safely ours: compile in memory only
+        bytecode_cache = None
+    return Environment(
         loader=FileSystemLoader(str(template_dir)),
-        autoescape=select_autoescape(enabled_extensions=(".j2",)),
+        bytecode_cache=bytecode_cache,
+        autoescape=False,  # emitting Java, not HTML; string values arrive escaped by escape_java_string
         trim_blocks=True,
         lstrip_blocks=True,
+        optimized=True,
+        auto_reload=False,
     )
-    tmpl = env.get_template("templates_PageObjectPF.j2")
-    java = tmpl.render(
+
+
+@lru_cache(maxsize=None)
+def _get_template(template_dir: Path, name: str = TEMPLATE_NAME) -> Template:
+    return _get_env(template_dir).get_template(name)
+
+
+@lru_cache(maxsize=None)
+def _render_header(template_dir: Path, package: str, name_annotation_import: str) -> str:
+    # Package + imports only depend on these, so batch runs render them once
+    return _get_template(template_dir, HEADER_TEMPLATE_NAME).render(
         package_name=package,
-        provided_name=provided_name,
-        class_name=class_name,
-        fields=[f.__dict__ for f in fields],
-        timeout_seconds=timeout_seconds,
         name_annotation_import=name_annotation_import,
-        source_path=str(source_file) if source_file else None,
     )
 
-    # Create package directory structure
-    package_path = Path(*package.split('.'))
-    target_dir = out_dir / package_path
+
+@lru_cache(maxsize=None)
+def _ensure_pkg_dir(out_dir: str, package: str) -> Path:
+    # Create package directory structure once per (out_dir, package)
+    target_dir = Path(out_dir, *package.split('.'))
     target_dir.mkdir(parents=True, exist_ok=True)
-    out_path = target_dir / f"{class_name}.java"
-    out_path.write_text(java, encoding="utf-8")
+    return target_dir
+
+
+def _build_java(package: str, class_name: str, provided_name: str, fields: List[FieldDef], timeout_seconds: int, name_annotation_import: str) -> str:
+    # Same output as the .j2 templates, without a template engine in the loop
+    lines = [
+        f"package {package};",
+        "",
+        f"import {name_annotation_import};",
+        *_JAVA_IMPORTS,
+        "",
+        f"@Name(\"{provided_name}\")",
+        f"public class {class_name} {{",
+        "    private final WebDriver driver;",
+        f"    private final Duration timeout = Duration.ofSeconds({timeout_seconds});",
+        "",
+        "    // Elements",
+    ]
+    for f in fields:
+        lines.append(f"    @Name(\"{f.display_name}\")")
+        lines.append(f"    @FindBy({f.findby_attr} = \"{f.findby_value}\")")
+        lines.append(f"    private WebElement {f.name};")
+        lines.append("")
+    lines.append(f"    public {class_name}(WebDriver driver) {{")
+    lines.append("        this.driver = driver;")
+    lines.append("        PageFactory.initElements(driver, this);")
+    lines.append("    }")
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def _render_class(package: str, class_name: str, provided_name: str, fields: List[FieldDef], timeout_seconds: int, name_annotation_import: str, template_dir: Path, out_dir: Path, source_file: Optional[Path] = None, engine: str = DEFAULT_ENGINE) -> Path:
+    # Both engines paste values verbatim into Java string literals
+    provided_name = escape_java_string(provided_name)
+    if engine == "jinja":
+        header = _render_header(template_dir, package, name_annotation_import)
+        body = _get_template(template_dir).render(
+            provided_name=provided_name,
+            class_name=class_name,
+            fields=fields,
+            timeout_seconds=timeout_seconds,
+            source_path=str(source_file) if source_file else None,
+        )
+        java = f"{header}\n\n{body}"
+    else:
+        java = _build_java(package, class_name, provided_name, fields, timeout_seconds, name_annotation_import)
+
+    out_path = _ensure_pkg_dir(str(out_dir), package) / f"{class_name}.java"
+    try:
+        out_path.write_text(java, encoding="utf-8")
+    except FileNotFoundError:
+        # Directory was removed since it was cached (e.g. between REPL codegen runs)
+        _ensure_pkg_dir.cache_clear()
+        _ensure_pkg_dir(str(out_dir), package)
+        out_path.write_text(java, encoding="utf-8")
     return out_path
 
 
-def generate_for_file(json_path: Path, package: str, provided_page_name: str, out_dir: Path, timeout_seconds: int, name_annotation_import: str) -> Path:
+def generate_for_file(json_path: Path, package: str, provided_page_name: str, out_dir: Path, timeout_seconds: int, name_annotation_import: str, engine: str = DEFAULT_ENGINE) -> Path:
     elements = _load_json(json_path)
     fields = _compute_fields(elements)
     class_name = to_class_name(provided_page_name)
@@ -99,6 +201,7 @@ def generate_for_file(json_path: Path, package: str, provided_page_name: str, ou
         template_dir=Path(__file__).parent,
         out_dir=out_dir,
         source_file=json_path,
+        engine=engine,
     )
 
 
@@ -110,6 +213,7 @@ def main(argv: Optional[List[str]] = None) -> int:
     parser.add_argument("--out", "-o", default="src/test/java", help="Output root directory for generated .java files (default: src/test/java).")
     parser.add_argument("--timeout-seconds", type=int, default=DEFAULT_TIMEOUT, help=f"Timeout seconds for waits (default: {DEFAULT_TIMEOUT}).")
     parser.add_argument("--name-annotation-import", default=DEFAULT_NAME_ANNOTATION_IMPORT, help=f"Fully-qualified @Name annotation import (default: {DEFAULT_NAME_ANNOTATION_IMPORT}).")
+    parser.add_argument("--engine", choices=ENGINES, default=DEFAULT_ENGINE, help=f"Java emitter: 'builtin' (fast, no template engine) or 'jinja' (renders the bundled .j2 templates) (default: {DEFAULT_ENGINE}).")
 
     args = parser.parse_args(argv)
 
@@ -135,25 +239,35 @@ def main(argv: Optional[List[str]] = None) -> int:
             out_dir=out_dir,
             timeout_seconds=args.timeout_seconds,
             name_annotation_import=args.name_annotation_import,
+            engine=args.engine,
         )
         print(f"Generated: {out_path}")
         return 0
 
     if in_path.is_dir():
-        json_files = sorted([p for p in in_path.glob("*.json")])
+        with os.scandir(in_path) as it:
+            json_files = sorted(in_path / e.name for e in it if e.name.endswith(".json") and e.is_file())
         if not json_files:
             print(f"No JSON files found in directory: {in_path}", file=sys.stderr)
             return 2
-        for jf in json_files:
-            provided = args.class_name or jf.stem
-            out_path = generate_for_file(
-                json_path=jf,
-                package=args.package,
-                provided_page_name=provided,
-                out_dir=out_dir,
-                timeout_seconds=args.timeout_seconds,
-                name_annotation_import=args.name_annotation_import,
-            )
+        jobs = [
+            (jf, args.package, args.class_name or jf.stem, out_dir, args.timeout_seconds, args.name_annotation_import, args.engine)
+            for jf in json_files
+        ]
+        # Jobs that map to the same <Name>Page.java (e.g. a fixed --class-name) must write
+        # in order so the last file still wins, as it always has. Compare case-folded:
+        # on case-insensitive filesystems ABPage.java and AbPage.java are one file.
+        class_names = {to_class_name(job[2]).casefold() for job in jobs}
+        shared_output = len(class_names) < len(jobs)
+        workers = min(len(jobs), os.cpu_count() or 1)
+        if len(jobs) < PARALLEL_MIN_FILES or shared_output or workers == 1:
+            out_paths = [generate_for_file(*job) for job in jobs]
+        else:
+            # Files are independent; fan out across cores. Results keep input order.
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(generate_for_file, *job) for job in jobs]
+                out_paths = [f.result() for f in futures]
+        for out_path in out_paths:
             print(f"Generated: {out_path}")
         return 0
 
@@ -1,20 +1,41 @@
 from __future__ import annotations
 
-from typing import Dict, Tuple, Optional
+from typing import Callable, Tuple, Optional
+
+from .scan_element import Element
+
+_JAVA_ESCAPE = str.maketrans({
+    "\\": "\\\\",
+    "\"": "\\\"",
+    "\n": "\\n",
+    "\r": "\\r",
+    "\t": "\\t",
+})
 
 
 def escape_java_string(value: str) -> str:
     """Escape a string literal for inclusion inside double-quoted Java code."""
-    return (
-        value.replace("\\", "\\\\")
-        .replace("\"", "\\\"")
-        .replace("\n", "\\n")
-        .replace("\r", "\\r")
-        .replace("\t", "\\t")
-    )
+    return value.translate(_JAVA_ESCAPE)
+
+
+def _attr_css(key: str) -> Callable[[str], str]:
+    return lambda v: f"[{key}='" + escape_java_string(v) + "']"
 
 
-def pick_findby(element: Dict) -> Optional[Tuple[str, str]]:
+# (source, key, findby_attr, formatter) in priority order; source is "attributes"
+# for the element's DOM attributes or "element" for Element fields.
+_PRIORITIES: Tuple[Tuple[str, str, str, Callable[[str], str]], ...] = (
+    ("attributes", "data-test", "css", _attr_css("data-test")),
+    ("attributes", "data-testid", "css", _attr_css("data-testid")),
+    ("attributes", "id", "id", escape_java_string),
+    ("element", "id", "id", escape_java_string),
+    ("attributes", "name", "name", escape_java_string),
+    ("element", "css", "css", escape_java_string),
+    ("element", "xpath", "xpath", escape_java_string),
+)
+
+
+def pick_findby(element: Element) -> Optional[Tuple[str, str]]:
     """
     Decide which @FindBy to use for the element according to priority:
       1) data-test / data-testid -> css
@@ -25,28 +46,9 @@ def pick_findby(element: Dict) -> Optional[Tuple[str, str]]:
 
     Returns (findby_attr, findby_value) or None if cannot decide.
     """
-    attrs = (element.get("attributes") or {})
-    data_test = attrs.get("data-test")
-    data_testid = attrs.get("data-testid")
-    if data_test:
-        return "css", f"[data-test='" + escape_java_string(str(data_test)) + "']"
-    if data_testid:
-        return "css", f"[data-testid='" + escape_java_string(str(data_testid)) + "']"
-
-    el_id = attrs.get("id") or element.get("id")
-    if el_id:
-        return "id", escape_java_string(str(el_id))
-
-    el_name = attrs.get("name")
-    if el_name:
-        return "name", escape_java_string(str(el_name))
-
-    css = element.get("css")
-    if css:
-        return "css", escape_java_string(str(css))
-
-    xpath = element.get("xpath")
-    if xpath:
-        return "xpath", escape_java_string(str(xpath))
-
+    attrs = element.attributes
+    for source, key, findby_attr, fmt in _PRIORITIES:
+        value = attrs.get(key) if source == "attributes" else getattr(element, key)
+        if value:
+            return findby_attr, fmt(str(value))
     return None
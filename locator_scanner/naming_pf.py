@@ -3,44 +3,77 @@ from __future__ import annotations
 import re
 from typing import Dict, List
 
-_CAMEL_INVALID = re.compile(r"[^A-Za-z0-9]+")
+from .scan_element import Element
 
+_TOKEN_RE = re.compile(r"[A-Za-z0-9]+")
+# Batch variant: NUL separates sources in a joined buffer and is emitted as its own token
+_SEP = "\x00"
+_BATCH_TOKEN_RE = re.compile(r"[A-Za-z0-9]+|\x00")
 
-def to_field_base(element: Dict) -> str:
-    attrs = element.get("attributes") or {}
+
+def _field_source(element: Element) -> str:
+    attrs = element.attributes
     source = (
-        element.get("id")
+        element.id
         or attrs.get("id")
         or attrs.get("name")
         or attrs.get("data-test")
-        or element.get("tag")
+        or element.tag
         or "element"
     )
-    parts = [p for p in _CAMEL_INVALID.sub(" ", str(source)).strip().split() if p]
-    if not parts:
+    return str(source)
+
+
+def _camel(tokens: List[str]) -> str:
+    if not tokens:
         return "element"
-    head, *tail = parts
-    return head.lower() + "".join(w.capitalize() for w in tail)
+    return tokens[0].lower() + "".join(w.capitalize() for w in tokens[1:])
+
+
+def to_field_base(element: Element) -> str:
+    return _camel(_TOKEN_RE.findall(_field_source(element)))
+
+
+def to_field_bases(elements: List[Element]) -> List[str]:
+    """Batch form of to_field_base: one regex scan over all sources instead of one per element."""
+    sources = [_field_source(e) for e in elements]
+    if not sources:
+        return []
+    joined = _SEP.join(sources)
+    if joined.count(_SEP) != len(sources) - 1:
+        # A source carries its own NUL; the joined buffer can't be split back reliably
+        return [_camel(_TOKEN_RE.findall(s)) for s in sources]
+
+    bases: List[str] = []
+    tokens: List[str] = []
+    for tok in _BATCH_TOKEN_RE.findall(joined):
+        if tok == _SEP:
+            bases.append(_camel(tokens))
+            tokens = []
+        else:
+            tokens.append(tok)
+    bases.append(_camel(tokens))
+    return bases
 
 
 def dedupe_names(bases: List[str]) -> List[str]:
-    seen = {}
-    result = []
+    seen: Dict[str, int] = {}
+    result: List[str] = []
+    append = result.append
     for b in bases:
-        if b not in seen:
+        idx = seen.get(b)
+        if idx is None:
             seen[b] = 1
-            result.append(b)
+            append(b)
         else:
-            idx = seen[b]
             seen[b] = idx + 1
-            result.append(f"{b}{idx}")
+            append(b + str(idx))
     return result
 
 
 def to_class_name(provided: str) -> str:
     # Ensure PascalCase and append 'Page' suffix if not present
-    parts = [p.capitalize() for p in _CAMEL_INVALID.sub(" ", str(provided)).strip().split() if p]
-    name = "".join(parts) or "Page"
+    name = "".join(w.capitalize() for w in _TOKEN_RE.findall(str(provided))) or "Page"
     if not name.endswith("Page"):
         name += "Page"
     return name
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import sys
+from typing import Any, Dict, NamedTuple, Optional
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Element(NamedTuple):
+    """One scanned element as read back from scan JSON (see xpath_builder.scan_interactables)."""
+    tag: Optional[str]
+    text: Optional[str]
+    name: Optional[str]
+    id: Optional[str]
+    xpath: Optional[str]
+    css: Optional[str]
+    role: Optional[Dict[str, Any]]
+    attributes: Dict[str, str]
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Element":
+        # Unknown keys (e.g. "error" entries) are dropped; missing ones become None.
+        # Tags, roles and attribute names repeat across thousands of elements, so
+        # they are interned to share one string object per distinct value.
+        role = data.get("role")
+        if isinstance(role, dict) and "role" in role:
+            role = {**role, "role": _intern(role["role"])}
+        attrs = data.get("attributes") or {}
+        return cls(
+            tag=_intern(data.get("tag")),
+            text=data.get("text"),
+            name=data.get("name"),
+            id=data.get("id"),
+            xpath=data.get("xpath"),
+            css=data.get("css"),
+            role=role,
+            attributes={_intern(k): v for k, v in attrs.items()},
+        )
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import json
+import sys
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Dict, Optional
 
-from playwright.sync_api import sync_playwright, Page
+try:
+    import orjson
+except ImportError:  # optional speedup (pip install "Locat8r[fast]")
+    orjson = None
 
 from .codegen_pf import (
     generate_for_file,
@@ -14,6 +18,9 @@ from .codegen_pf import (
 )
 from .xpath_builder import scan_interactables
 
+if TYPE_CHECKING:
+    from playwright.sync_api import Page
+
 BANNER = (
     "Loc8r Playwright Scanner\n"
     "Commands:\n"
@@ -24,13 +31,63 @@ BANNER = (
     "  quit/exit              -> close browser and exit\n"
 )
 
+# Larger scan results are not echoed to the terminal
+MAX_JSON_PREVIEW_BYTES = 64 * 1024
+
+_QUIT_HELP = (
+    "\nExit Loc8r\n"
+    "Usage: quit | exit\n"
+    "  Closes the browser and terminates the session.\n\n"
+)
+
+# Full text per 'help <topic>', built once at import
+_HELP_TOPICS: Dict[str, str] = {
+    "": BANNER + "\nType 'help codegen' for detailed generator usage, or 'help scan' / 'help url'.\n",
+    "codegen": (
+        "\nCode generation (PageFactory, @FindBy)\n"
+        "Usage: codegen <json> [PageName] [outDir]\n"
+        "  <json>     Path to a scan JSON file produced by 'scan'\n"
+        "  [PageName] Base page name (e.g., Login). The class will be '<Name>Page'. If omitted, you'll be prompted.\n"
+        "  [outDir]   Output root (default: src/test/java). Package path is created within it.\n\n"
+        "Examples:\n"
+        "  codegen masha.json Login src/test/java\n"
+        "  codegen login.json   # will prompt for page name\n\n"
+        "Notes:\n"
+        "- Uses stable-first locator priority: data-test/testid → id → name → css → xpath.\n"
+        "- Fields and class are annotated with @Name; configure import via the standalone CLI 'loc8r-codegen'.\n"
+        "- For more advanced options (package, timeout, annotation import), use the standalone CLI:\n"
+        "    loc8r-codegen --input masha.json --package com.example.pages --class-name Login --out src/test/java\n\n"
+    ),
+    "scan": (
+        "\nScan current page for interactable elements\n"
+        "Usage: scan [output.json]\n"
+        "  Without argument: prints found elements and their locators (XPath, CSS, id, role).\n"
+        "  With output.json: also saves the JSON results to the given file.\n\n"
+    ),
+    "url": (
+        "\nNavigate to URL in the opened browser\n"
+        "Usage: url <https://...>\n"
+        "  Example: url https://example.com\n\n"
+    ),
+    "quit": _QUIT_HELP,
+    "exit": _QUIT_HELP,
+}
+
+
+def _dump_json(items: list) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(items, option=orjson.OPT_INDENT_2)
+    return json.dumps(items, ensure_ascii=False, indent=2).encode("utf-8")
+
 
 def _print_scan(page: Page, out_path: Optional[str] = None) -> None:
     items = scan_interactables(page)
-    print(f"Found {len(items)} interactable elements:\n")
+    # Build the listing in memory and write it once instead of one print per element
+    buf = [f"Found {len(items)} interactable elements:\n\n"]
+    append = buf.append
     for i, it in enumerate(items, 1):
         if "error" in it:
-            print(f"#{i}: ERROR: {it['error']}")
+            append(f"#{i}: ERROR: {it['error']}\n")
             continue
         tag = it.get("tag")
         txt = (it.get("text") or "")
@@ -46,28 +103,36 @@ def _print_scan(page: Page, out_path: Optional[str] = None) -> None:
                 role_str = f"get_by_role('{role['role']}', name='{role['name']}')"
             else:
                 role_str = f"get_by_role('{role['role']}')"
-        print(
+        append(
             f"#{i}: <{tag}> text='{txt_disp}'\n"
             f"    name: {name}\n"
             f"    id: {idv}\n"
             f"    xpath: {xp}\n"
             f"    css: {css}\n"
-            f"    role: {role_str}"
+            f"    role: {role_str}\n"
         )
-    print()
-    print("JSON output (copy-paste if needed):")
-    json_text = json.dumps(items, ensure_ascii=False, indent=2)
-    print(json_text)
+    payload = _dump_json(items)
+    if len(payload) <= MAX_JSON_PREVIEW_BYTES:
+        append("\nJSON output (copy-paste if needed):\n")
+        append(payload.decode("utf-8"))
+        append("\n")
+    else:
+        # Nobody copy-pastes megabytes from a terminal; point to the file instead
+        hint = "" if out_path else "; use 'scan <output.json>' to save it"
+        append(f"\nJSON output: {len(payload)} bytes, too large to print{hint}.\n")
+    sys.stdout.write("".join(buf))
     if out_path:
         try:
-            with open(out_path, "w", encoding="utf-8") as f:
-                f.write(json_text)
+            Path(out_path).write_bytes(payload)
             print(f"Saved scan results to: {out_path}")
         except Exception as e:
             print(f"Failed to save results to '{out_path}': {e}")
 
 
 def main() -> None:
+    # Deferred: importing Playwright costs hundreds of ms
+    from playwright.sync_api import sync_playwright
+
     print(BANNER)
     print("Launching Chromium...")
     with sync_playwright() as p:
@@ -95,47 +160,7 @@ def main() -> None:
             elif cmd == "help":
                 # Detailed help: allow 'help codegen', 'help scan', etc.
                 topic = arg.strip().lower()
-                if not topic:
-                    print(BANNER)
-                    print("Type 'help codegen' for detailed generator usage, or 'help scan' / 'help url'.")
-                else:
-                    if topic == "codegen":
-                        print(
-                            "\nCode generation (PageFactory, @FindBy)\n"
-                            "Usage: codegen <json> [PageName] [outDir]\n"
-                            "  <json>     Path to a scan JSON file produced by 'scan'\n"
-                            "  [PageName] Base page name (e.g., Login). The class will be '<Name>Page'. If omitted, you'll be prompted.\n"
-                            "  [outDir]   Output root (default: src/test/java). Package path is created within it.\n\n"
-                            "Examples:\n"
-                            "  codegen masha.json Login src/test/java\n"
-                            "  codegen login.json   # will prompt for page name\n\n"
-                            "Notes:\n"
-                            "- Uses stable-first locator priority: data-test/testid → id → name → css → xpath.\n"
-                            "- Fields and class are annotated with @Name; configure import via the standalone CLI 'loc8r-codegen'.\n"
-                            "- For more advanced options (package, timeout, annotation import), use the standalone CLI:\n"
-                            "    loc8r-codegen --input masha.json --package com.example.pages --class-name Login --out src/test/java\n"
-                        )
-                    elif topic == "scan":
-                        print(
-                            "\nScan current page for interactable elements\n"
-                            "Usage: scan [output.json]\n"
-                            "  Without argument: prints found elements and their locators (XPath, CSS, id, role).\n"
-                            "  With output.json: also saves the JSON results to the given file.\n"
-                        )
-                    elif topic == "url":
-                        print(
-                            "\nNavigate to URL in the opened browser\n"
-                            "Usage: url <https://...>\n"
-                            "  Example: url https://example.com\n"
-                        )
-                    elif topic in ("quit", "exit"):
-                        print(
-                            "\nExit Loc8r\n"
-                            "Usage: quit | exit\n"
-                            "  Closes the browser and terminates the session.\n"
-                        )
-                    else:
-                        print(f"Unknown help topic: {topic}. Type 'help' to see available commands.")
+                sys.stdout.write(_HELP_TOPICS.get(topic) or f"Unknown help topic: {topic}. Type 'help' to see available commands.\n")
             elif cmd == "url":
                 if not arg:
                     print("Usage: url https://example.com")
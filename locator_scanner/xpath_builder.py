@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import re
-from typing import List, Dict, Any, Optional, Tuple
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Dict, Any, Iterable, Optional, Tuple
 
-from playwright.sync_api import Page, ElementHandle
+if TYPE_CHECKING:
+    from playwright.sync_api import Page
 
 
 def _is_autogenerated_id(val: Optional[str]) -> bool:
@@ -42,33 +44,60 @@ def _is_autogenerated_id(val: Optional[str]) -> bool:
     return False
 
 
-def _css_escape_value(val: str) -> str:
-    # Minimal escaping for CSS attribute values: escape double quotes and backslashes
-    return val.replace("\\", "\\\\").replace('"', '\\"')
+# (attribute, value) pairs that make it into a selector predicate
+AttrPairs = Tuple[Tuple[str, str], ...]
+
 
+def _filter_attrs(attrs: Dict[str, Optional[str]], keys: Optional[Iterable[str]] = None) -> AttrPairs:
+    """Pairs worth a predicate: non-empty, at most 120 chars, and not an autogenerated id.
 
-def _build_css_attr_predicates(attrs: Dict[str, Optional[str]]) -> List[str]:
-    preds: List[str] = []
-    for k, v in attrs.items():
-        if not v:
+    Filtered once and shared by the XPath and CSS predicate builders.
+    """
+    pairs = []
+    for k in attrs if keys is None else keys:
+        v = attrs.get(k)
+        if not v or len(v) > 120:
             continue
-        if len(v) > 120:
+        if k == "id" and _is_autogenerated_id(v):
             continue
-        preds.append(f"[{k}=\"{_css_escape_value(v)}\"]")
-    return preds
+        pairs.append((k, v))
+    return tuple(pairs)
+
+
+_CSS_ESCAPE = str.maketrans({"\\": "\\\\", '"': '\\"'})
+
+
+# Both escapers are pure and see the same short values over and over across siblings
+@lru_cache(maxsize=4096)
+def _css_escape_value(val: str) -> str:
+    # Minimal escaping for CSS attribute values: escape double quotes and backslashes
+    if '"' not in val and "\\" not in val:
+        return val
+    return val.translate(_CSS_ESCAPE)
+
 
+def _build_css_attr_predicates(pairs: AttrPairs) -> List[str]:
+    return [f"[{k}=\"{_css_escape_value(v)}\"]" for k, v in pairs]
 
+
+@lru_cache(maxsize=4096)
 def _escape_xpath_literal(s: str) -> str:
     # Handles quotes inside string for XPath literal
     if "'" not in s:
         return f"'{s}'"
     if '"' not in s:
         return f'"{s}"'
-    parts = s.split("'")
-    return "concat(" + ",".join([f"'{p}'" for p in parts[:-1]] + ["\"'\""] + [f"'{parts[-1]}'"]) + ")"
+    # Both kinds: single-quoted runs with a "'" between each pair, empty runs dropped
+    args: List[str] = []
+    for i, part in enumerate(s.split("'")):
+        if i:
+            args.append("\"'\"")
+        if part:
+            args.append(f"'{part}'")
+    return "concat(" + ",".join(args) + ")"
 
 
-CANDIDATE_ATTRS = [
+CANDIDATE_ATTRS = (
     "data-testid",
     "data-test",
     "data-qa",
@@ -78,9 +107,12 @@ CANDIDATE_ATTRS = [
     "title",
     "type",
     "role",
-]
+)
+
+# Tried one by one, in this order, by both the XPath and CSS ladders
+STRONG_ATTRS = ("data-testid", "data-test", "data-qa", "name", "aria-label", "title")
 
-INTERACTABLE_CSS = [
+INTERACTABLE_CSS = (
     "a[href]",
     "button",
     "input:not([type='hidden'])",
@@ -89,170 +121,306 @@ INTERACTABLE_CSS = [
     "[role='button']",
     "[tabindex]",
     "[contenteditable='true']",
-]
+)
 
+_INTERACTABLE_SELECTOR = ", ".join(INTERACTABLE_CSS)
 
-def _normalize_text(text: str) -> str:
-    return re.sub(r"\s+", " ", text or "").strip()
 
-
-def _try_unique(page: Page, xpath: str) -> Tuple[bool, int]:
-    try:
-        matches = page.locator(f"xpath={xpath}")
-        count = matches.count()
-        return count == 1, count
-    except Exception:
-        return False, 0
-
-
-def _try_unique_css(page: Page, css: str) -> Tuple[bool, int]:
-    try:
-        matches = page.locator(css)
-        count = matches.count()
-        return count == 1, count
-    except Exception:
-        return False, 0
-
-
-def _build_attribute_predicates(attrs: Dict[str, Optional[str]]) -> List[str]:
-    preds = []
-    for k, v in attrs.items():
-        if not v:
-            continue
-        # skip overly long values
-        if len(v) > 120:
+def _normalize_text(text: str) -> str:
+    # Same result as re.sub(r"\s+", " ", text).strip(), without the regex engine
+    if not text:
+        return ""
+    return " ".join(text.split())
+
+
+def _build_attribute_predicates(pairs: AttrPairs) -> List[str]:
+    return [f"@{k}={_escape_xpath_literal(v)}" for k, v in pairs]
+
+
+# Everything the locator builders need about each matched element, gathered in one
+# round-trip instead of several el.evaluate() calls per element.
+_COLLECT_INFO_JS = r"""
+(nodes) => {
+  if (!nodes.length) return [];
+  // Text comes back whitespace-normalized the way _normalize_text would do it (Python's
+  // str.isspace() set), so the builders use it as-is
+  const PY_WS = /[\t-\r\x1c-\x20\x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000]+/g;
+  function pyNorm(s){ return s.replace(PY_WS, ' ').replace(/^ | $/g, ''); }
+  // Labels were always collapsed on JS whitespace first
+  function norm(s){ return pyNorm((s || '').replace(/\s+/g, ' ')); }
+  function labelText(n){
+    if (n.id) {
+      const lbl = sweep.labelFor.get(n.id);
+      if (lbl) return norm(lbl.innerText || lbl.textContent);
+    }
+    for (let p = n; p; p = p.parentElement) {
+      if (p.tagName && p.tagName.toLowerCase() === 'label') return norm(p.innerText || p.textContent);
+    }
+    return null;
+  }
+  const ANCESTOR_XPATH = "ancestor::*[@id!='' or @data-testid!='' or @data-test!='' or @data-qa!=''][1]";
+  const ANCESTOR_KEYS = ['id', 'data-testid', 'data-test', 'data-qa', 'aria-label', 'role', 'class'];
+  function stableAncestor(n){
+    // Nearest ancestor with a non-empty stable attribute, found by the native XPath engine
+    const a = document.evaluate(ANCESTOR_XPATH, n, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    if (!a) return null;
+    const attrs = {};
+    for (const k of ANCESTOR_KEYS) { if (a.hasAttribute(k)) attrs[k] = a.getAttribute(k); }
+    return { tag: a.tagName ? a.tagName.toLowerCase() : 'div', attrs };
+  }
+  const TEST_ID_KEYS = ['data-testid', 'data-test', 'data-qa'];
+  const HTML_NS = 'http://www.w3.org/1999/xhtml';
+  function bump(m, k){ const c = (m.get(k) || 0) + 1; m.set(k, c); return c; }
+  // One pass over the document and its open shadow roots collects everything positional or
+  // document-wide: each target's same-tag document index and nth-of-type among siblings,
+  // the first label[for] per id, and id / (tag, test-id attr, value) counts, the latter both
+  // in the document (what XPath sees) and across shadow roots (what CSS sees).
+  function sweepDom(){
+    const t = {
+      globalIndex: new Map(), nthOfType: new Map(), labelFor: new Map(),
+      id: new Map(), idDeep: new Map(), testId: new Map(), testIdDeep: new Map(),
+    };
+    const targets = new Set(nodes);
+    const parents = new Map();
+    // Only values carried by the targets are worth counting
+    const wantedIds = new Set();
+    const wantedTestIds = new Set();
+    for (const n of nodes) {
+      if (n.parentElement) parents.set(n.parentElement, new Map());
+      const id = n.getAttribute('id');
+      if (id !== null) wantedIds.add(id);
+      for (const k of TEST_ID_KEYS) {
+        const v = n.getAttribute(k);
+        if (v) wantedTestIds.add(n.localName + '\0' + k + '\0' + v);
+      }
+    }
+    const tagSeen = new Map();
+    const roots = [document];
+    for (let i = 0; i < roots.length; i++) {
+      const inDocument = i === 0;
+      for (const el of roots[i].querySelectorAll('*')) {
+        if (el.shadowRoot) roots.push(el.shadowRoot);
+        const siblings = parents.get(el.parentElement);
+        if (siblings) {
+          const c = bump(siblings, el.tagName.toLowerCase());
+          if (targets.has(el)) t.nthOfType.set(el, c);
+        }
+        const id = el.getAttribute('id');
+        if (id !== null && wantedIds.has(id)) {
+          bump(t.idDeep, id);
+          if (inDocument) bump(t.id, id);
+        }
+        if (inDocument) {
+          const g = bump(tagSeen, el.localName);
+          if (targets.has(el)) t.globalIndex.set(el, g);
+          if (el.localName === 'label') {
+            const f = el.getAttribute('for');
+            if (f !== null && !t.labelFor.has(f)) t.labelFor.set(f, el);
+          }
+        }
+        if (el.namespaceURI !== HTML_NS || !wantedTestIds.size) continue;
+        for (const k of TEST_ID_KEYS) {
+          const v = el.getAttribute(k);
+          if (v === null) continue;
+          const key = el.localName + '\0' + k + '\0' + v;
+          if (!wantedTestIds.has(key)) continue;
+          bump(t.testIdDeep, key);
+          if (inDocument) bump(t.testId, key);
+        }
+      }
+    }
+    return t;
+  }
+  const sweep = sweepDom();
+  // Quirks-mode '#id' matches ASCII case-insensitively, so the exact tallies do not cover it
+  const quirks = document.compatMode === 'BackCompat';
+  function testIdCounts(n, tag, attrs){
+    if (n.namespaceURI !== HTML_NS) return null;
+    let out = null;
+    for (const k of TEST_ID_KEYS) {
+      if (!attrs[k]) continue;
+      const key = tag + '\0' + k + '\0' + attrs[k];
+      (out = out || {})[k] = [sweep.testId.get(key) || 0, sweep.testIdDeep.get(key) || 0];
+    }
+    return out;
+  }
+  return nodes.map((n) => {
+    try {
+      const attrs = {};
+      for (const a of n.attributes || []) { attrs[a.name] = a.value; }
+      const tag = n.tagName ? n.tagName.toLowerCase() : 'unknown';
+      const info = {
+        tag,
+        text: pyNorm((n.innerText || n.textContent || '').trim()),
+        attrs,
+        labelText: labelText(n),
+        ancestor: stableAncestor(n),
+        nthOfType: sweep.nthOfType.get(n) || 1,
+        globalIndex: (n.localName === tag && sweep.globalIndex.get(n)) || 1,
+      };
+      if (attrs.id !== undefined) {
+        info.idCount = sweep.id.get(attrs.id) || 0;
+        info.idCountDeep = sweep.idDeep.get(attrs.id) || 0;
+        if (quirks) info.quirks = true;
+      }
+      const counts = testIdCounts(n, tag, attrs);
+      if (counts) info.testIdCounts = counts;
+      return info;
+    } catch (e) {
+      return { error: String(e) };
+    }
+  });
+}
+"""
+
+# Ancestor attributes used by the CSS builder (the XPath builder uses all collected ones)
+_CSS_ANCESTOR_KEYS = ("id", "data-testid", "data-test", "data-qa")
+
+
+def _collect_element_info(page: Page, selector: str = _INTERACTABLE_SELECTOR) -> List[Dict[str, Any]]:
+    # Query and collect in one round-trip, without an ElementHandle per element
+    return page.eval_on_selector_all(selector, _COLLECT_INFO_JS)
+
+
+# For each group of [kind, selector] candidates (kind is "xpath", "css", "css-scoped" for CSS
+# with combinators, or "unique" for a selector already known to match once), return the
+# first selector that matches exactly one element, or null. Invalid selectors count as 0.
+# CSS is counted inside open shadow roots too, as Playwright's css engine does. Playwright
+# also lets combinators cross shadow boundaries, which querySelectorAll cannot; when the page
+# has shadow roots, a group that reaches a "css-scoped" candidate returns its index instead.
+_PICK_UNIQUE_JS = r"""
+(groups) => {
+  const roots = [document];
+  for (let i = 0; i < roots.length; i++) {
+    for (const el of roots[i].querySelectorAll('*')) { if (el.shadowRoot) roots.push(el.shadowRoot); }
+  }
+  // Sibling elements share many candidates (ancestor scopes, bare tag combos); count each once
+  const seen = new Map();
+  function count(kind, sel){
+    const key = kind + ' ' + sel;
+    let n = seen.get(key);
+    if (n === undefined) { n = countUncached(kind, sel); seen.set(key, n); }
+    return n;
+  }
+  function countUncached(kind, sel){
+    try {
+      if (kind === 'xpath') {
+        return document.evaluate(sel, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null).snapshotLength;
+      }
+      let n = 0;
+      for (const r of roots) n += r.querySelectorAll(sel).length;
+      return n;
+    } catch (e) {
+      return 0;
+    }
+  }
+  return groups.map((cands) => {
+    for (let i = 0; i < cands.length; i++) {
+      const [kind, sel] = cands[i];
+      if (kind === 'unique') return sel;
+      if (kind === 'css-scoped' && roots.length > 1) return i;
+      if (count(kind, sel) === 1) return sel;
+    }
+    return null;
+  });
+}
+"""
+
+
+def _pick_unique(page: Page, groups: List[List[Tuple[str, str]]]) -> List[Optional[str]]:
+    # Ladders that open with an already-known unique selector never leave Python;
+    # the rest share one round-trip, which is skipped when nothing is left to probe
+    picked: List[Optional[str]] = []
+    pending: List[int] = []
+    for i, cands in enumerate(groups):
+        if cands and cands[0][0] == "unique":
+            picked.append(cands[0][1])
+        else:
+            picked.append(None)
+            if cands:
+                pending.append(i)
+    if pending:
+        probed = page.evaluate(_PICK_UNIQUE_JS, [groups[i] for i in pending])
+        for i, res in zip(pending, probed):
+            if isinstance(res, int):
+                # Shadow DOM page: finish this ladder with Playwright's own selector engine
+                res = _pick_unique_with_locators(page, groups[i][res:])
+            picked[i] = res
+    return picked
+
+
+def _pick_unique_with_locators(page: Page, cands: List[Tuple[str, str]]) -> Optional[str]:
+    # One round-trip per candidate; only used where the in-page count would disagree
+    for kind, sel in cands:
+        if kind == "unique":
+            return sel
+        try:
+            if page.locator(f"xpath={sel}" if kind == "xpath" else sel).count() == 1:
+                return sel
+        except Exception:
             continue
-        preds.append(f"@{k}={_escape_xpath_literal(v)}")
-    return preds
-
-
-def _get_element_basic_info(el: ElementHandle) -> Dict[str, Any]:
-    return el.evaluate(
-        "(node) => {\n"
-        "  const txt = (node.innerText || node.textContent || '').trim();\n"
-        "  const attrs = {};\n"
-        "  for (const a of node.attributes || []) { attrs[a.name] = a.value; }\n"
-        "  const tag = node.tagName ? node.tagName.toLowerCase() : 'unknown';\n"
-        "  return { tag, text: txt, attrs };\n"
-        "}"
-    )
+    return None
 
 
-def build_xpath_for_element(page: Page, el: ElementHandle) -> str:
-    info = _get_element_basic_info(el)
+def _xpath_candidates(info: Dict[str, Any], cand: Optional[AttrPairs] = None) -> List[Tuple[str, str]]:
+    """(kind, XPath) candidates in priority order; the first unique one wins."""
     tag = info.get("tag") or "*"
-    text = _normalize_text(info.get("text") or "")
+    text = info.get("text") or ""
     attrs: Dict[str, str] = info.get("attrs") or {}
+    cands: List[Tuple[str, str]] = []
 
-    # 1) id uniqueness
+    # 1) id uniqueness (counted once per scan by the collector when available)
     el_id = attrs.get("id")
     if el_id and not _is_autogenerated_id(el_id):
         xpath = f"//*[@id={_escape_xpath_literal(el_id)}]"
-        unique, _ = _try_unique(page, xpath)
-        if unique:
-            return xpath
-
-    # 2) Strong attributes
-    for strong in ["data-testid", "data-test", "data-qa", "name", "aria-label", "title"]:
+        id_count = info.get("idCount")
+        if id_count == 1:
+            return [("unique", xpath)]
+        if id_count is None:
+            cands.append(("xpath", xpath))
+
+    # 2) Strong attributes (test ids are counted by the collector when available)
+    test_ids = info.get("testIdCounts") or {}
+    for strong in STRONG_ATTRS:
         val = attrs.get(strong)
         if val:
             xpath = f"//{tag}[@{strong}={_escape_xpath_literal(val)}]"
-            unique, _ = _try_unique(page, xpath)
-            if unique:
-                return xpath
+            counts = test_ids.get(strong)
+            if counts is None:
+                cands.append(("xpath", xpath))
+            elif counts[0] == 1:
+                cands.append(("unique", xpath))
 
     # 3) Buttons/links by text
     if tag in ("a", "button") and text:
         # Try exact normalized text
-        xpath = f"//{tag}[normalize-space(.)={_escape_xpath_literal(text)}]"
-        unique, _ = _try_unique(page, xpath)
-        if unique:
-            return xpath
+        cands.append(("xpath", f"//{tag}[normalize-space(.)={_escape_xpath_literal(text)}]"))
         # Try contains
         short = text[:60]
         if short:
-            xpath = f"//{tag}[contains(normalize-space(.), {_escape_xpath_literal(short)})]"
-            unique, _ = _try_unique(page, xpath)
-            if unique:
-                return xpath
+            cands.append(("xpath", f"//{tag}[contains(normalize-space(.), {_escape_xpath_literal(short)})]"))
 
     # 4) Inputs by associated label
-    try:
-        label_text = el.evaluate(
-            "(n) => {\n"
-            "  function norm(s){return (s||'').replace(/\\s+/g,' ').trim();}\n"
-            "  if (n.id) {\n"
-            "    const labels = document.querySelectorAll('label[for]');\n"
-            "    for (const lbl of labels) {\n"
-            "      if (lbl.getAttribute('for') === n.id) {\n"
-            "        return norm(lbl.innerText||lbl.textContent);\n"
-            "      }\n"
-            "    }\n"
-            "  }\n"
-            "  let p = n;\n"
-            "  while (p) {\n"
-            "    if (p.tagName && p.tagName.toLowerCase()==='label') {\n"
-            "      return norm(p.innerText||p.textContent);\n"
-            "    }\n"
-            "    p = p.parentElement;\n"
-            "  }\n"
-            "  return null;\n"
-            "}" 
-        )
-    except Exception:
-        label_text = None
+    label_text = info.get("labelText")
     if label_text:
-        x = f"//{tag}[ancestor-or-self::*[self::label][normalize-space(.)={_escape_xpath_literal(_normalize_text(label_text))}]]"
-        unique, _ = _try_unique(page, x)
-        if unique:
-            return x
+        cands.append(("xpath", f"//{tag}[ancestor-or-self::*[self::label][normalize-space(.)={_escape_xpath_literal(label_text)}]]"))
 
     # 5) Tag + multiple attribute predicates
-    # Remove autogenerated id from candidate attrs
-    filtered_attr_map = {k: attrs.get(k) for k in CANDIDATE_ATTRS}
-    if filtered_attr_map.get("id") and _is_autogenerated_id(filtered_attr_map.get("id")):
-        filtered_attr_map["id"] = None
-    attr_preds = _build_attribute_predicates(filtered_attr_map)
+    if cand is None:
+        cand = _filter_attrs(attrs, CANDIDATE_ATTRS)
+    attr_preds = _build_attribute_predicates(cand)
     if attr_preds:
         xpath = f"//{tag}[" + " and ".join(attr_preds) + "]"
-        unique, count = _try_unique(page, xpath)
-        if unique:
-            return xpath
+        cands.append(("xpath", xpath))
         # Try narrowing with text contains
         if text:
-            xpath2 = xpath[:-1] + f" and contains(normalize-space(.), {_escape_xpath_literal(text[:40])})]"
-            unique2, _ = _try_unique(page, xpath2)
-            if unique2:
-                return xpath2
+            cands.append(("xpath", xpath[:-1] + f" and contains(normalize-space(.), {_escape_xpath_literal(text[:40])})]"))
 
     # 6) Ancestor with id or data-testid
-    try:
-        anc_info = el.evaluate(
-            "(n)=>{\n"
-            "  const pick = ['id','data-testid','data-test','data-qa','aria-label','role','class'];\n"
-            "  function norm(s){return (s||'').replace(/\s+/g,' ').trim();}\n"
-            "  let a = n.parentElement;\n"
-            "  while (a){\n"
-            "    const tag = a.tagName ? a.tagName.toLowerCase(): 'div';\n"
-            "    const attrs = {};\n"
-            "    for (const k of pick){ if (a.hasAttribute && a.hasAttribute(k)) attrs[k]=a.getAttribute(k); }\n"
-            "    if (attrs.id || attrs['data-testid'] || attrs['data-test'] || attrs['data-qa']){\n"
-            "      return {tag, attrs, text: norm(a.innerText||a.textContent)};\n"
-            "    }\n"
-            "    a = a.parentElement;\n"
-            "  }\n"
-            "  return null;\n"
-            "}"
-        )
-    except Exception:
-        anc_info = None
+    anc_info = info.get("ancestor")
     if anc_info:
         a_tag = anc_info.get("tag", "*")
-        a_attrs = anc_info.get("attrs", {})
-        # Filter out autogenerated id from ancestor attributes
-        if a_attrs.get("id") and _is_autogenerated_id(a_attrs.get("id")):
-            a_attrs["id"] = None
-        a_preds = _build_attribute_predicates(a_attrs)
+        a_preds = _build_attribute_predicates(_filter_attrs(anc_info.get("attrs") or {}))
         if a_preds:
             parent_xpath = f"//{a_tag}[" + " and ".join(a_preds) + "]"
             child_pred = ""
@@ -260,138 +428,110 @@ def build_xpath_for_element(page: Page, el: ElementHandle) -> str:
                 child_pred = "[" + " and ".join(attr_preds) + "]"
             elif text:
                 child_pred = f"[contains(normalize-space(.), {_escape_xpath_literal(text[:40])})]"
-            xpath = f"{parent_xpath}//{tag}{child_pred}"
-            unique, _ = _try_unique(page, xpath)
-            if unique:
-                return xpath
+            cands.append(("xpath", f"{parent_xpath}//{tag}{child_pred}"))
 
-    # 7) Fallback: positional index among same tag
-    # Count index 1-based among siblings of same tag under body
-    try:
-        idx = el.evaluate(
-            "(n)=>{\n"
-            "  let i=0;\n"
-            "  const tag = n.tagName.toLowerCase();\n"
-            "  const nodes = Array.from(document.querySelectorAll(tag));\n"
-            "  for (let k=0;k<nodes.length;k++){ if (nodes[k]===n) { return k+1; } }\n"
-            "  return 1;\n"
-            "}"
-        )
-    except Exception:
-        idx = 1
-    xpath = f"//{tag}[{idx}]"
-    return xpath
+    return cands
 
 
-def _css_selector_from_attrs(tag: str, attrs: Dict[str, Optional[str]]) -> str:
-    preds = _build_css_attr_predicates(attrs)
+def _xpath_fallback(info: Dict[str, Any]) -> str:
+    # 7) Positional index among same tag in the document
+    tag = info.get("tag") or "*"
+    idx = info.get("globalIndex") or 1
+    return f"//{tag}[{idx}]"
+
+
+def build_xpath_for_element(page: Page, info: Dict[str, Any]) -> str:
+    picked = _pick_unique(page, [_xpath_candidates(info)])[0]
+    return picked or _xpath_fallback(info)
+
+
+def _css_selector_from_attrs(tag: str, pairs: AttrPairs) -> str:
+    preds = _build_css_attr_predicates(pairs)
     base = tag if tag else "*"
     if preds:
         return base + "".join(preds)
     return base
 
 
-def build_css_for_element(page: Page, el: ElementHandle) -> str:
-    info = _get_element_basic_info(el)
+# Ids that are emitted as '#id' rather than '[id="..."]'
+_SIMPLE_CSS_ID_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9\-\:_\.]*$")
+# ...and the subset for which '#id' really means "id equals" (no '.', ':' or trailing newline)
+_PLAIN_CSS_ID_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_-]*")
+
+# Characters a quoted CSS attribute value cannot carry verbatim
+_CSS_UNSAFE_CHARS = frozenset("\n\r\f\x00")
+
+
+def _css_candidates(info: Dict[str, Any], cand: Optional[AttrPairs] = None) -> List[Tuple[str, str]]:
+    """(kind, CSS) candidates in priority order; the first unique one wins."""
     tag = info.get("tag") or "*"
     attrs: Dict[str, str] = info.get("attrs") or {}
+    cands: List[Tuple[str, str]] = []
 
     # 1) id unique
     el_id = attrs.get("id")
     if el_id and not _is_autogenerated_id(el_id):
-        simple = re.match(r"^[A-Za-z_][A-Za-z0-9\-\:_\.]*$", el_id or "") is not None
+        simple = _SIMPLE_CSS_ID_RE.match(el_id) is not None
         css = f"#{el_id}" if simple else f"[id=\"{_css_escape_value(el_id)}\"]"
-        unique, _ = _try_unique_css(page, css)
-        if unique:
-            return css
+        id_count = info.get("idCountDeep")
+        if simple:
+            # '#a.b' / '#a:b' read as class/pseudo selectors, and quirks mode folds case,
+            # so only a probe can tell
+            exact = not info.get("quirks") and _PLAIN_CSS_ID_RE.fullmatch(el_id) is not None
+        else:
+            # raw newlines/NULs make '[id="..."]' invalid or lossy
+            exact = not _CSS_UNSAFE_CHARS.intersection(el_id)
+        if id_count is None or not exact:
+            cands.append(("css", css))
+        elif id_count == 1:
+            return [("unique", css)]
 
     # 2) strong attributes
-    for strong in ["data-testid", "data-test", "data-qa", "name", "aria-label", "title"]:
+    test_ids = info.get("testIdCounts") or {}
+    for strong in STRONG_ATTRS:
         val = attrs.get(strong)
         if val:
             css = f"{tag}[{strong}=\"{_css_escape_value(val)}\"]"
-            unique, _ = _try_unique_css(page, css)
-            if unique:
-                return css
+            counts = test_ids.get(strong)
+            if counts is None or _CSS_UNSAFE_CHARS.intersection(val):
+                # raw newlines/NULs make the selector invalid or lossy; let the probe decide
+                cands.append(("css", css))
+            elif counts[1] == 1:
+                cands.append(("unique", css))
 
     # 3) tag + multiple attrs
-    cand = {k: attrs.get(k) for k in CANDIDATE_ATTRS}
-    if cand.get("id") and _is_autogenerated_id(cand.get("id")):
-        cand["id"] = None
-    css = _css_selector_from_attrs(tag, cand)
-    if css:
-        unique, _ = _try_unique_css(page, css)
-        if unique:
-            return css
+    if cand is None:
+        cand = _filter_attrs(attrs, CANDIDATE_ATTRS)
+    own_sel = _css_selector_from_attrs(tag, cand)
+    cands.append(("css", own_sel))
 
     # 4) with ancestor having stable id/data-testid
-    try:
-        anc = el.evaluate(
-            "(n)=>{\n"
-            "  const pick=['id','data-testid','data-test','data-qa'];\n"
-            "  let a=n.parentElement;\n"
-            "  while(a){\n"
-            "    const attrs={};\n"
-            "    for(const k of pick){ if(a.hasAttribute && a.hasAttribute(k)) attrs[k]=a.getAttribute(k); }\n"
-            "    if(attrs.id||attrs['data-testid']||attrs['data-test']||attrs['data-qa']){\n"
-            "      const tag=a.tagName?a.tagName.toLowerCase():'div';\n"
-            "      return {tag, attrs};\n"
-            "    }\n"
-            "    a=a.parentElement;\n"
-            "  }\n"
-            "  return null;\n"
-            "}"
-        )
-    except Exception:
-        anc = None
+    anc = info.get("ancestor")
+    a_sel = None
     if anc:
         a_tag = anc.get("tag") or "*"
-        a_attrs = anc.get("attrs") or {}
-        if a_attrs.get("id") and _is_autogenerated_id(a_attrs.get("id")):
-            a_attrs["id"] = None
-        a_sel = _css_selector_from_attrs(a_tag, a_attrs)
-        child_sel = _css_selector_from_attrs(tag, cand)
-        css2 = f"{a_sel} {child_sel}"
-        unique, _ = _try_unique_css(page, css2)
-        if unique:
-            return css2
-
-    # 5) fallback nth-of-type under nearest stable ancestor or body
-    try:
-        nth = el.evaluate(
-            "(n)=>{\n"
-            "  const p=n.parentElement;\n"
-            "  if(!p) return {index:1, parent:null};\n"
-            "  const tag=n.tagName.toLowerCase();\n"
-            "  let c=0;\n"
-            "  for(const ch of p.children){ if(ch.tagName && ch.tagName.toLowerCase()===tag){ c++; if(ch===n) return {index:c}; } }\n"
-            "  return {index:1};\n"
-            "}"
-        )
-    except Exception:
-        nth = {"index": 1}
-    idx = nth.get("index", 1)
+        a_sel = _css_selector_from_attrs(a_tag, _filter_attrs(anc.get("attrs") or {}, _CSS_ANCESTOR_KEYS))
+        cands.append(("css-scoped", f"{a_sel} {own_sel}"))
+
+    # 5) nth-of-type under nearest stable ancestor or body
+    idx = info.get("nthOfType") or 1
+    cands.append(("css-scoped", f"{a_sel or 'body'} > {tag}:nth-of-type({idx})"))
+    return cands
 
-    parent_css = "body"
-    if anc:
-        a_attrs2 = anc.get("attrs") or {}
-        if a_attrs2.get("id") and _is_autogenerated_id(a_attrs2.get("id")):
-            a_attrs2["id"] = None
-        parent_css = _css_selector_from_attrs(anc.get("tag") or "*", a_attrs2)
-    css3 = f"{parent_css} > {tag}:nth-of-type({idx})"
-    unique, _ = _try_unique_css(page, css3)
-    if unique:
-        return css3
 
+def build_css_for_element(page: Page, info: Dict[str, Any]) -> str:
+    picked = _pick_unique(page, [_css_candidates(info)])[0]
     # last resort: just tag
-    return tag
+    return picked or (info.get("tag") or "*")
 
 
-def _infer_role_and_name(page: Page, el: ElementHandle) -> Tuple[Optional[str], Optional[str]]:
-    info = _get_element_basic_info(el)
+RoleName = Tuple[Optional[str], Optional[str]]
+
+
+def _infer_role_and_name(info: Dict[str, Any]) -> RoleName:
     tag = info.get("tag") or "*"
     attrs: Dict[str, str] = info.get("attrs") or {}
-    text = _normalize_text(info.get("text") or "")
+    text = info.get("text") or ""
 
     role = attrs.get("role")
     itype = (attrs.get("type") or "").lower()
@@ -421,54 +561,51 @@ def _infer_role_and_name(page: Page, el: ElementHandle) -> Tuple[Optional[str],
     name: Optional[str] = attrs.get("aria-label") or attrs.get("title") or attrs.get("alt")
     if not name:
         # try associated label for form controls
-        try:
-            lbl = el.evaluate(
-                "(n)=>{\n"
-                "  function norm(s){return (s||'').replace(/\\s+/g,' ').trim();}\n"
-                "  if(n.id){\n"
-                "    const labels=document.querySelectorAll('label[for]');\n"
-                "    for(const lb of labels){ if(lb.getAttribute('for')===n.id) return norm(lb.innerText||lb.textContent); }\n"
-                "  }\n"
-                "  let p=n; while(p){ if(p.tagName && p.tagName.toLowerCase()==='label') return norm(p.innerText||p.textContent); p=p.parentElement;}\n"
-                "  return null;\n"
-                "}"
-            )
-        except Exception:
-            lbl = None
-        if isinstance(lbl, str) and lbl.strip():
-            name = _normalize_text(lbl)
+        name = info.get("labelText") or None
     if not name and role in {"button","link"} and text:
         name = text
 
     return role, name
 
 
-def build_role_locator_for_element(page: Page, el: ElementHandle) -> Optional[Dict[str, Any]]:
-    role, name = _infer_role_and_name(page, el)
-    if not role:
-        return None
+def _role_is_unique(page: Page, role: str, name: Optional[str]) -> bool:
     try:
         loc = page.get_by_role(role, name=name) if name else page.get_by_role(role)
-        count = loc.count()
-        if count == 1:
-            return {"role": role, "name": name}
+        return loc.count() == 1
     except Exception:
-        pass
-    return None
+        return False
 
 
-def _build_human_name(page: Page, el: ElementHandle) -> str:
+def build_role_locator_for_element(
+    page: Page,
+    info: Dict[str, Any],
+    role_name: Optional[RoleName] = None,
+    seen: Optional[Dict[RoleName, bool]] = None,
+) -> Optional[Dict[str, Any]]:
+    # Matching stays with Playwright's role engine; `seen` memoizes its verdict per
+    # (role, name) so pairs repeated within a scan are probed once
+    role, name = role_name or _infer_role_and_name(info)
+    if not role:
+        return None
+    if seen is None:
+        unique = _role_is_unique(page, role, name)
+    else:
+        unique = seen.get((role, name))
+        if unique is None:
+            unique = seen[(role, name)] = _role_is_unique(page, role, name)
+    return {"role": role, "name": name} if unique else None
+
+
+def _build_human_name(info: Dict[str, Any], role_name: Optional[RoleName] = None) -> str:
     # Prefer accessible or human-facing labels
-    try:
-        role, acc_name = _infer_role_and_name(page, el)
-    except Exception:
-        role, acc_name = None, None
-    try:
-        info = _get_element_basic_info(el)
-    except Exception:
-        info = {"tag": None, "text": None, "attrs": {}}
+    if role_name is None:
+        try:
+            role_name = _infer_role_and_name(info)
+        except Exception:
+            role_name = (None, None)
+    role, acc_name = role_name
     tag = (info.get("tag") or "element").lower()
-    text = _normalize_text(info.get("text") or "")
+    text = info.get("text") or ""
     attrs: Dict[str, Any] = info.get("attrs") or {}
 
     # Candidate list in priority order
@@ -513,30 +650,52 @@ def _ensure_unique_names(items: List[Dict[str, Any]]) -> None:
 
 
 def scan_interactables(page: Page) -> List[Dict[str, Any]]:
-    selector = ", ".join(INTERACTABLE_CSS)
-    els = page.query_selector_all(selector)
-    results: List[Dict[str, Any]] = []
-    for el in els:
+    infos = _collect_element_info(page)
+    # Filled by index: errors right away, everything else once the ladders are probed
+    results: List[Any] = [None] * len(infos)
+
+    # Build every element's XPath and CSS ladders, then probe them all in one round-trip
+    groups: List[List[Tuple[str, str]]] = []
+    laddered: List[int] = []
+    for i, info in enumerate(infos):
+        if "error" in info:
+            results[i] = {"error": info["error"]}
+            continue
+        try:
+            # Shared by both ladders
+            cand = _filter_attrs(info.get("attrs") or {}, CANDIDATE_ATTRS)
+            xpath_group = _xpath_candidates(info, cand)
+            css_group = _css_candidates(info, cand)
+        except Exception as e:
+            results[i] = {"error": str(e)}
+            continue
+        groups.append(xpath_group)
+        groups.append(css_group)
+        laddered.append(i)
+    picked = _pick_unique(page, groups)
+
+    infer_role_and_name = _infer_role_and_name
+    build_role_locator = build_role_locator_for_element
+    build_human_name = _build_human_name
+    role_seen: Dict[RoleName, bool] = {}
+    for i, xpath, css in zip(laddered, picked[0::2], picked[1::2]):
+        info = infos[i]
         try:
-            info = _get_element_basic_info(el)
-            xpath = build_xpath_for_element(page, el)
-            css = build_css_for_element(page, el)
-            role_loc = build_role_locator_for_element(page, el)
+            # Inferred once, shared by the role locator and the human-readable name
+            role_name = infer_role_and_name(info)
             attrs = info.get("attrs") or {}
-            name = _build_human_name(page, el)
-            entry = {
+            results[i] = {
                 "tag": info.get("tag"),
-                "text": _normalize_text(info.get("text")),
+                "text": info.get("text") or "",
                 "attributes": attrs,
                 "id": attrs.get("id"),
-                "name": name,
-                "xpath": xpath,
-                "css": css,
-                "role": role_loc,
+                "name": build_human_name(info, role_name),
+                "xpath": xpath or _xpath_fallback(info),
+                "css": css or info.get("tag") or "*",
+                "role": build_role_locator(page, info, role_name, role_seen),
             }
-            results.append(entry)
         except Exception as e:
-            results.append({"error": str(e)})
+            results[i] = {"error": str(e)}
     # Ensure uniqueness of names across the page
     _ensure_unique_names([it for it in results if "error" not in it])
     return results
@@ -3,7 +3,9 @@ from __future__ import annotations
 import json
 from pathlib import Path
 
+from locator_scanner import codegen_pf
 from locator_scanner.codegen_pf import generate_for_file
+from locator_scanner.scan_element import Element
 
 
 def test_locator_priority_and_generation(tmp_path: Path):
@@ -76,3 +78,119 @@ def test_locator_priority_and_generation(tmp_path: Path):
     assert "@FindBy(id = \"user-name\")" in text or "@FindBy(css = \"[data-test='username']\")" in text
     assert "@FindBy(id = \"password\")" in text or "@FindBy(css = \"[data-test='password']\")" in text
     assert "@FindBy(css = \"input[data-test='login-button']\")" in text or "@FindBy(css = \"[data-test='login-button']\")" in text
+
+
+def test_builtin_engine_matches_jinja_template(tmp_path: Path):
+    sample = [
+        {
+            "tag": "input",
+            "attributes": {"data-test": "username", "id": "user-name"},
+            "id": "user-name",
+            "name": "Username",
+        },
+        {"tag": "a", "attributes": {}, "name": "Docs", "css": "a[href=\"/docs\"]"},
+        {"tag": "div", "attributes": {}},
+    ]
+    json_path = tmp_path / "page.json"
+    json_path.write_text(json.dumps(sample), encoding="utf-8")
+
+    outputs = []
+    for engine in ("builtin", "jinja"):
+        out_file = generate_for_file(
+            json_path=json_path,
+            package="com.example.pages",
+            provided_page_name="Home",
+            out_dir=tmp_path / engine,
+            timeout_seconds=7,
+            name_annotation_import="com.example.annotations.Name",
+            engine=engine,
+        )
+        outputs.append(out_file.read_text(encoding="utf-8"))
+
+    assert outputs[0] == outputs[1]
+    assert "Duration.ofSeconds(7)" in outputs[0]
+    assert "@FindBy(css = \"a[href=\\\"/docs\\\"]\")" in outputs[0]
+
+
+def test_quoted_names_are_java_escaped(tmp_path: Path):
+    sample = [
+        {"tag": "button", "attributes": {"data-test": "save"}, "name": "Click \"Save\" \\ now"},
+    ]
+    json_path = tmp_path / "page.json"
+    json_path.write_text(json.dumps(sample), encoding="utf-8")
+
+    for engine in ("builtin", "jinja"):
+        out_file = generate_for_file(
+            json_path=json_path,
+            package="com.example.pages",
+            provided_page_name="Say \"hi\"",
+            out_dir=tmp_path / engine,
+            timeout_seconds=5,
+            name_annotation_import="com.example.annotations.Name",
+            engine=engine,
+        )
+        text = out_file.read_text(encoding="utf-8")
+        assert "@Name(\"Say \\\"hi\\\"\")" in text
+        assert "@Name(\"Click \\\"Save\\\" \\\\ now\")" in text
+
+
+def test_directory_mode_stays_serial_when_outputs_collide(tmp_path: Path, monkeypatch):
+    sample = [{"tag": "button", "attributes": {"data-test": "save"}, "name": "Save"}]
+    in_dir = tmp_path / "scans"
+    in_dir.mkdir()
+    # a-b.json and ab.json give ABPage/AbPage, one file on case-insensitive filesystems
+    for stem in ("a-b", "ab", "c", "d"):
+        (in_dir / f"{stem}.json").write_text(json.dumps(sample), encoding="utf-8")
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("directory jobs should have run serially")
+
+    monkeypatch.setattr(codegen_pf, "ProcessPoolExecutor", no_pool)
+    assert codegen_pf.main(["-i", str(in_dir), "-o", str(tmp_path / "out")]) == 0
+
+    # Distinct outputs on a single CPU gain nothing from a pool either
+    (in_dir / "ab.json").unlink()
+    (in_dir / "e.json").write_text(json.dumps(sample), encoding="utf-8")
+    monkeypatch.setattr(codegen_pf.os, "cpu_count", lambda: 1)
+    assert codegen_pf.main(["-i", str(in_dir), "-o", str(tmp_path / "out")]) == 0
+
+
+def test_error_entries_and_roles_load_and_skip(tmp_path: Path, capsys):
+    sample = [
+        {"error": "Element is not attached to the DOM"},
+        {
+            "tag": "button",
+            "attributes": {},
+            "name": "Go",
+            "css": "button.go",
+            "role": {"role": "button", "name": "Go"},
+        },
+        {"tag": "div", "attributes": {}},
+    ]
+    json_path = tmp_path / "page.json"
+    json_path.write_text(json.dumps(sample), encoding="utf-8")
+
+    err = Element.from_dict(sample[0])
+    assert err.attributes == {}
+    assert all(v is None for v in err[:-1])
+    assert Element.from_dict(sample[1]).role == {"role": "button", "name": "Go"}
+
+    for engine in ("builtin", "jinja"):
+        out_file = generate_for_file(
+            json_path=json_path,
+            package="com.example.pages",
+            provided_page_name="Home",
+            out_dir=tmp_path / engine,
+            timeout_seconds=5,
+            name_annotation_import="com.example.annotations.Name",
+            engine=engine,
+        )
+        text = out_file.read_text(encoding="utf-8")
+        assert text.count("@FindBy(") == 1
+        assert "@Name(\"Go\")\n    @FindBy(css = \"button.go\")\n    private WebElement button;" in text
+
+        warnings = capsys.readouterr().err.splitlines()
+        assert warnings == [
+            "[codegen_pf] Warning: skipped element without stable locator: None name=None id=None",
+            "[codegen_pf] Warning: skipped element without stable locator: div name=None id=None",
+        ]
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from locator_scanner.naming_pf import dedupe_names, to_field_base, to_field_bases
+from locator_scanner.scan_element import Element
+
+
+def _el(**data) -> Element:
+    return Element.from_dict(data)
+
+
+def test_to_field_bases_matches_per_element_path():
+    elements = [
+        _el(id="user-name", tag="input"),
+        _el(tag="input", attributes={"name": "pass_word"}),
+        _el(tag="button", attributes={"data-test": "login button"}),
+        _el(tag="a", attributes={"id": "Docs.Link2"}),
+        _el(tag="div"),
+        _el(id="héllo wörld", tag="span"),
+    ]
+    assert to_field_bases(elements) == [to_field_base(e) for e in elements]
+    assert to_field_bases(elements)[:3] == ["userName", "passWord", "loginButton"]
+
+
+def test_to_field_bases_empty_sources_give_element():
+    elements = [_el(), _el(id="---", tag="input"), _el(tag="")]
+    assert to_field_bases(elements) == ["element", "element", "element"]
+    assert to_field_bases([]) == []
+
+
+def test_to_field_bases_falls_back_when_a_source_has_nul():
+    # A NUL inside a source would split the joined buffer in the wrong place
+    elements = [_el(id="a\x00b", tag="input"), _el(id="c", tag="input")]
+    assert to_field_bases(elements) == [to_field_base(e) for e in elements] == ["aB", "c"]
+
+
+def test_dedupe_names_numbers_repeats_from_one():
+    assert dedupe_names(["save", "save", "name", "save", "name"]) == ["save", "save1", "name", "save2", "name1"]
+    assert dedupe_names([]) == []
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import re
+
+import pytest
+
+from locator_scanner.xpath_builder import (
+    CANDIDATE_ATTRS,
+    _css_candidates,
+    _escape_xpath_literal,
+    _filter_attrs,
+    _pick_unique,
+    _xpath_candidates,
+    scan_interactables,
+)
+
+
+class _FakeLocator:
+    def __init__(self, n: int):
+        self._n = n
+
+    def count(self) -> int:
+        return self._n
+
+
+class _FakePage:
+    """Just enough of a Playwright page for the probing code, driven by selector counts."""
+
+    def __init__(self, counts=None, infos=None, shadow=False):
+        self.counts = counts or {}
+        self.infos = infos or []
+        self.shadow = shadow
+        self.evaluated = []
+        self.located = []
+
+    def eval_on_selector_all(self, selector, script):
+        return self.infos
+
+    def evaluate(self, script, groups):
+        # Mirrors _PICK_UNIQUE_JS
+        self.evaluated.append(groups)
+        out = []
+        for cands in groups:
+            res = None
+            for i, (kind, sel) in enumerate(cands):
+                if kind == "unique":
+                    res = sel
+                elif kind == "css-scoped" and self.shadow:
+                    res = i
+                elif self.counts.get(sel, 0) == 1:
+                    res = sel
+                else:
+                    continue
+                break
+            out.append(res)
+        return out
+
+    def locator(self, sel):
+        self.located.append(sel)
+        return _FakeLocator(self.counts.get(sel.removeprefix("xpath="), 0))
+
+    def get_by_role(self, role, name=None):
+        return _FakeLocator(0)
+
+
+def _eval_xpath_literal(expr: str) -> str:
+    # Evaluates a plain string literal or a concat() of literals, nothing else
+    if not expr.startswith("concat("):
+        assert expr[0] == expr[-1] and expr[0] in "'\""
+        return expr[1:-1]
+    args = re.findall(r"'[^']*'|\"[^\"]*\"", expr[len("concat("):-1])
+    assert "concat(" + ",".join(args) + ")" == expr
+    assert len(args) >= 2
+    return "".join(a[1:-1] for a in args)
+
+
+@pytest.mark.parametrize("value", [
+    "plain",
+    "it's",
+    'say "hi"',
+    "it's \"x\"",
+    "a'b'c\"",
+    "'\"",
+    "\"'",
+    "''\"''",
+])
+def test_escape_xpath_literal_round_trips(value: str):
+    assert _eval_xpath_literal(_escape_xpath_literal(value)) == value
+
+
+def test_filter_attrs_drops_empty_long_and_autogenerated_id():
+    attrs = {"id": "ember1234", "name": "", "title": "x" * 121, "data-test": "save", "role": "button"}
+    assert _filter_attrs(attrs, CANDIDATE_ATTRS) == (("data-test", "save"), ("role", "button"))
+    assert _filter_attrs({"id": "login"}, CANDIDATE_ATTRS) == (("id", "login"),)
+
+
+def test_autogenerated_id_is_not_a_candidate():
+    info = {"tag": "button", "attrs": {"id": "ember1234"}, "idCount": 1, "idCountDeep": 1}
+    assert all("ember1234" not in sel for _, sel in _xpath_candidates(info))
+    assert all("ember1234" not in sel for _, sel in _css_candidates(info))
+
+
+def test_tallied_unique_id_skips_the_probe():
+    info = {"tag": "input", "attrs": {"id": "login"}, "idCount": 1, "idCountDeep": 1}
+    assert _xpath_candidates(info) == [("unique", "//*[@id='login']")]
+    assert _css_candidates(info) == [("unique", "#login")]
+
+
+def test_tallied_duplicate_id_is_dropped_and_untallied_id_is_probed():
+    dup = {"tag": "input", "attrs": {"id": "login"}, "idCount": 2, "idCountDeep": 2}
+    assert ("xpath", "//*[@id='login']") not in _xpath_candidates(dup)
+    assert all(sel != "#login" for _, sel in _css_candidates(dup))
+
+    untallied = {"tag": "input", "attrs": {"id": "login"}}
+    assert _xpath_candidates(untallied)[0] == ("xpath", "//*[@id='login']")
+    assert _css_candidates(untallied)[0] == ("css", "#login")
+
+
+@pytest.mark.parametrize("el_id, selector", [
+    ("a.b", "#a.b"),    # reads as id 'a' with class 'b'
+    ("zz\n", "#zz\n"),  # '$' lets the simple-id pattern accept a trailing newline
+])
+def test_ids_with_inexact_css_are_probed(el_id: str, selector: str):
+    info = {"tag": "input", "attrs": {"id": el_id}, "idCount": 1, "idCountDeep": 1}
+    assert _css_candidates(info)[0] == ("css", selector)
+
+
+def test_attribute_id_selector_with_raw_newline_is_probed():
+    # A raw newline makes the attribute selector invalid, so it cannot take the shortcut
+    info = {"tag": "input", "attrs": {"id": "a\nb"}, "idCount": 1, "idCountDeep": 1}
+    assert _css_candidates(info)[0] == ("css", '[id="a\nb"]')
+
+
+def test_tallied_test_ids():
+    unique = {"tag": "button", "attrs": {"data-testid": "save"}, "testIdCounts": {"data-testid": [1, 1]}}
+    assert ("unique", "//button[@data-testid='save']") in _xpath_candidates(unique)
+    assert ("unique", 'button[data-testid="save"]') in _css_candidates(unique)
+
+    dup = {"tag": "button", "attrs": {"data-testid": "save"}, "testIdCounts": {"data-testid": [2, 2]}}
+    assert all(kind != "unique" for kind, _ in _xpath_candidates(dup))
+    assert all(kind != "unique" for kind, _ in _css_candidates(dup))
+    # Dropped from the strong-attribute step; the combined-attrs step still tries it
+    assert [sel for _, sel in _xpath_candidates(dup)].count("//button[@data-testid='save']") == 1
+
+    # concat() literals are exact now, so they take the shortcut; unsafe CSS values are still probed
+    quoted = {"tag": "a", "attrs": {"data-qa": "a'b'c\""}, "testIdCounts": {"data-qa": [1, 1]}}
+    assert _xpath_candidates(quoted)[0][0] == "unique"
+    newline = {"tag": "a", "attrs": {"data-qa": "a\nb"}, "testIdCounts": {"data-qa": [1, 1]}}
+    assert _css_candidates(newline)[0] == ("css", 'a[data-qa="a\nb"]')
+
+
+def test_quirks_mode_id_is_probed():
+    # '#Login' also matches id="login" in quirks mode; '[id=...]' and XPath stay exact
+    info = {"tag": "input", "attrs": {"id": "Login"}, "idCount": 1, "idCountDeep": 1, "quirks": True}
+    assert _css_candidates(info)[0] == ("css", "#Login")
+    assert _xpath_candidates(info) == [("unique", "//*[@id='Login']")]
+    info["attrs"]["id"] = "a b"
+    assert _css_candidates(info) == [("unique", '[id="a b"]')]
+
+
+def test_pick_unique_skips_the_round_trip_when_nothing_is_pending():
+    page = _FakePage()
+    groups = [[("unique", "#a"), ("css", "b")], [], [("unique", "//*[@id='c']")]]
+    assert _pick_unique(page, groups) == ["#a", None, "//*[@id='c']"]
+    assert page.evaluated == []
+
+
+def test_pick_unique_probes_only_the_pending_ladders():
+    page = _FakePage(counts={"b": 1})
+    groups = [[("unique", "#a")], [("css", "x"), ("css", "b")]]
+    assert _pick_unique(page, groups) == ["#a", "b"]
+    assert page.evaluated == [[groups[1]]]
+
+
+def test_pick_unique_finishes_scoped_css_with_locators_on_shadow_pages():
+    page = _FakePage(counts={"form .go": 1, "x": 1}, shadow=True)
+    groups = [[("css", "y"), ("css-scoped", "div .go"), ("css-scoped", "form .go"), ("css", "x")]]
+    assert _pick_unique(page, groups) == ["form .go"]
+    # The in-page probe already settled everything before the returned index
+    assert page.located == ["div .go", "form .go"]
+
+
+def test_scan_interactables_keeps_results_aligned_with_elements():
+    infos = [
+        {"tag": "input", "attrs": {"id": "first"}, "idCount": 1, "idCountDeep": 1},
+        {"error": "detached"},
+        {"tag": "input", "attrs": {"id": 5}},  # building its ladders raises
+        {"tag": "input", "attrs": {"id": "second"}},
+    ]
+    page = _FakePage(counts={"//*[@id='second']": 1, "#second": 1}, infos=infos)
+    results = scan_interactables(page)
+
+    assert [r.get("error") for r in results][:2] == [None, "detached"]
+    assert "error" in results[2]
+    assert (results[0]["xpath"], results[0]["css"]) == ("//*[@id='first']", "#first")
+    assert (results[3]["xpath"], results[3]["css"]) == ("//*[@id='second']", "#second")
+    # Only the untallied element needed the page
+    assert len(page.evaluated) == 1 and len(page.evaluated[0]) == 2